@@ -64,6 +64,7 @@ from whoosh.analysis.acore import (
     Composable,
     CompositionError,
     Token,
+    TokenBatch,
     entoken,
     unstopped,
 )
@@ -77,6 +78,7 @@ from whoosh.analysis.analyzers import (
     SimpleAnalyzer,
     StandardAnalyzer,
     StemmingAnalyzer,
+    standard_analyzer,
 )
 from whoosh.analysis.filters import (
     STOP_WORDS,
@@ -25,6 +25,8 @@
 # those of the authors and should not be interpreted as representing official
 # policies, either expressed or implied, of Matt Chaput.
 
+from array import array
+
 # Exceptions
 
 
@@ -69,6 +71,71 @@ def entoken(
         yield t
 
 
+def batch_tuples(analyzer, values, positions=False, chars=False, **kwargs):
+    """Runs the given analyzer (or tokenizer) on each string in ``values`` and
+    yields a ``(docnum, text, pos, startchar, endchar)`` tuple for each token.
+    This is the generic implementation of the ``batch()`` method of analyzers
+    and tokenizers.
+    """
+
+    for docnum, value in enumerate(values):
+        for t in analyzer(value, positions=positions, chars=chars, **kwargs):
+            yield (
+                docnum,
+                t.text,
+                t.pos if positions else None,
+                t.startchar if chars else None,
+                t.endchar if chars else None,
+            )
+
+
+def parallel_tuples(analyzer, values, workers=None, chunksize=64, **kwargs):
+    """Runs the given analyzer (or tokenizer) on each string in ``values``
+    using a pool of worker processes, and returns a list with one list of
+    ``(text, pos, startchar, endchar)`` tuples per string. This is the generic
+    implementation of the ``analyze_many()`` method of analyzers and
+    tokenizers.
+    """
+
+    import pickle
+    from multiprocessing import Pool, cpu_count
+
+    for name in ("positions", "chars"):
+        if name in kwargs:
+            raise TypeError(
+                f"analyze_many() always records positions and chars, "
+                f"don't pass {name!r}"
+            )
+
+    workers = workers or cpu_count()
+    # Each worker unpickles the analyzer once when it starts, instead of
+    # receiving it with every job
+    initargs = (pickle.dumps(analyzer), kwargs)
+    with Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+        return list(pool.imap(_worker_analyze, values, chunksize))
+
+
+# Worker functions for parallel_tuples()
+
+# The analyzer and keyword arguments used by this worker process, set when the
+# worker starts
+_worker_analyzer = None
+_worker_kwargs = None
+
+
+def _init_worker(data, kwargs):
+    import pickle
+
+    global _worker_analyzer, _worker_kwargs
+    _worker_analyzer = pickle.loads(data)
+    _worker_kwargs = kwargs
+
+
+def _worker_analyze(value):
+    tokens = _worker_analyzer(value, positions=True, chars=True, **_worker_kwargs)
+    return [(t.text, t.pos, t.startchar, t.endchar) for t in tokens]
+
+
 # Token object
 
 
@@ -121,7 +188,8 @@ class Token:
         self.boost = 1.0
         self.removestops = removestops
         self.mode = mode
-        self.__dict__.update(kwargs)
+        if kwargs:
+            self.__dict__.update(kwargs)
 
     def __repr__(self):
         parms = ", ".join(f"{name}={value!r}" for name, value in self.__dict__.items())
@@ -132,6 +200,48 @@ class Token:
         return Token(**self.__dict__)
 
 
+class TokenBatch:
+    """
+    Holds all the tokens from a piece of text as parallel sequences ("structure
+    of arrays") instead of a stream of :class:`Token` objects: a list of token
+    texts plus ``array("i")`` arrays of positions and start/end character
+    offsets. The item at index ``i`` of each sequence belongs to the same
+    token.
+
+    This is useful for code that consumes token attributes in bulk, since it
+    avoids setting and reading attributes on a token object for every word.
+    Use :meth:`RegexTokenizer.tokenize_batch` to create a batch and the
+    ``filter_batch()`` methods of filters such as :class:`LowercaseFilter` and
+    :class:`StopFilter` to transform it.
+    """
+
+    __slots__ = ("texts", "positions", "startchars", "endchars")
+
+    def __init__(self, texts=None, positions=None, startchars=None, endchars=None):
+        self.texts = [] if texts is None else texts
+        self.positions = array("i") if positions is None else positions
+        self.startchars = array("i") if startchars is None else startchars
+        self.endchars = array("i") if endchars is None else endchars
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.texts!r})"
+
+    def __len__(self):
+        return len(self.texts)
+
+    def select(self, indices):
+        """Keeps only the tokens at the given (ascending) indices."""
+
+        texts = self.texts
+        positions = self.positions
+        startchars = self.startchars
+        endchars = self.endchars
+        self.texts = [texts[i] for i in indices]
+        self.positions = array("i", [positions[i] for i in indices])
+        self.startchars = array("i", [startchars[i] for i in indices])
+        self.endchars = array("i", [endchars[i] for i in indices])
+
+
 # Composition support
 
 
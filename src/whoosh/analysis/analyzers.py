@@ -25,7 +25,15 @@
 # those of the authors and should not be interpreted as representing official
 # policies, either expressed or implied, of Matt Chaput.
 
-from whoosh.analysis.acore import Composable, CompositionError
+from functools import lru_cache
+
+from whoosh.analysis.acore import (
+    Composable,
+    CompositionError,
+    Token,
+    batch_tuples,
+    parallel_tuples,
+)
 from whoosh.analysis.filters import STOP_WORDS, LowercaseFilter, StopFilter
 from whoosh.analysis.intraword import IntraWordFilter
 from whoosh.analysis.morph import StemFilter
@@ -35,6 +43,7 @@ from whoosh.analysis.tokenizers import (
     RegexTokenizer,
     SpaceSeparatedTokenizer,
     Tokenizer,
+    _CommaSeparatedTokenizer,
     default_pattern,
 )
 from whoosh.lang.porter import stem
@@ -62,6 +71,53 @@ class Analyzer(Composable):
         # This method is intentionally left empty.
         pass
 
+    def batch(self, values, positions=False, chars=False, **kwargs):
+        """Analyzes a sequence of strings and yields a
+        ``(docnum, text, pos, startchar, endchar)`` tuple for each token, where
+        ``docnum`` is the index of the string in ``values``. ``pos`` is None
+        unless ``positions`` is True, and ``startchar``/``endchar`` are None
+        unless ``chars`` is True.
+
+        >>> ana = StandardAnalyzer()
+        >>> list(ana.batch(["Hello there", "big time"], positions=True))
+        [(0, "hello", 0, None, None), (0, "there", 1, None, None),
+         (1, "big", 0, None, None), (1, "time", 1, None, None)]
+
+        :param values: a sequence of unicode strings to analyze.
+        :param positions: whether to include token positions.
+        :param chars: whether to include token character offsets.
+        :param kwargs: additional keyword arguments to pass to the analyzer
+            for each string.
+        """
+
+        return batch_tuples(self, values, positions, chars, **kwargs)
+
+    def analyze_many(self, values, workers=None, chunksize=64, **kwargs):
+        """Analyzes a sequence of strings in parallel using a pool of worker
+        processes, and returns a list with one entry per input string. Each
+        entry is a list of ``(text, pos, startchar, endchar)`` tuples for the
+        tokens in that string.
+
+        Tokens are returned as tuples because the token objects yielded by
+        an analyzer are reused and can't usefully be sent between processes.
+
+        >>> ana = StandardAnalyzer()
+        >>> ana.analyze_many(["Hello there", "big time"])
+        [[("hello", 0, 0, 5), ("there", 1, 6, 11)],
+         [("big", 0, 0, 3), ("time", 1, 4, 8)]]
+
+        :param values: a sequence of unicode strings to analyze.
+        :param workers: the number of worker processes to use. The default is
+            the number of CPUs.
+        :param chunksize: the number of strings to send to a worker at once.
+        :param kwargs: additional keyword arguments to pass to the analyzer
+            for each string, e.g. ``mode="index"``. Positions and character
+            offsets are always recorded, so ``positions`` and ``chars`` can't
+            be passed.
+        """
+
+        return parallel_tuples(self, values, workers, chunksize, **kwargs)
+
 
 class CompositeAnalyzer(Analyzer):
     def __init__(self, *composables):
@@ -82,6 +138,13 @@ class CompositeAnalyzer(Analyzer):
                     f"Only one tokenizer allowed at the start of the analyzer: {self.items}"
                 )
 
+        self._fused = _is_fusable(self.items)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Older pickles don't have the _fused attribute
+        self._fused = _is_fusable(self.items)
+
     def __repr__(self):
         return "{}({})".format(
             self.__class__.__name__,
@@ -90,14 +153,30 @@ class CompositeAnalyzer(Analyzer):
 
     def __call__(self, value, no_morph=False, **kwargs):
         items = self.items
+        if self._fused and kwargs.get("tokenize", True):
+            # Tokenizer, lowercase and stop filter in a single generator
+            stopper = items[2] if len(items) > 2 else _no_stopper
+            return _fused_standard(items[0], stopper, value, **kwargs)
+
         # Start with tokenizer
         gen = items[0](value, **kwargs)
         # Run filters
-        for item in items[1:]:
-            if not (no_morph and hasattr(item, "is_morph") and item.is_morph):
+        if no_morph:
+            for item in items[1:]:
+                if not getattr(item, "is_morph", False):
+                    gen = item(gen)
+        else:
+            for item in items[1:]:
                 gen = item(gen)
         return gen
 
+    def batch(self, values, positions=False, chars=False, **kwargs):
+        items = self.items
+        if self._fused and not kwargs:
+            stopper = items[2] if len(items) > 2 else _no_stopper
+            return _fused_standard_batch(items[0], stopper, values, positions, chars)
+        return Analyzer.batch(self, values, positions, chars, **kwargs)
+
     def __getitem__(self, item):
         return self.items.__getitem__(item)
 
@@ -116,6 +195,132 @@ class CompositeAnalyzer(Analyzer):
         return any(item.is_morph for item in self.items)
 
 
+# Fused implementation of the RegexTokenizer | LowercaseFilter | StopFilter
+# chain used by StandardAnalyzer, and the RegexTokenizer | LowercaseFilter
+# chain used by SimpleAnalyzer. Running the stages in one generator saves
+# passing every token through extra generator frames. The stop word test
+# mirrors StopFilter.__call__ and must be kept in sync with it
+# (test_fused_matches_unfused compares the two). Both fused functions only use
+# match objects if the character offsets are needed, and otherwise work on the
+# tokenizer's list of token texts
+
+# Stands in for the StopFilter of a chain without one; it doesn't stop anything
+_no_stopper = StopFilter(stoplist=frozenset(), minsize=0)
+
+
+def _is_fusable(items):
+    return (
+        2 <= len(items) <= 3
+        # The fused path is only used with tokenize=True, where the comma
+        # tokenizer works the same as a plain RegexTokenizer
+        and items[0].__class__ in (RegexTokenizer, _CommaSeparatedTokenizer)
+        and items[1].__class__ is LowercaseFilter
+        and (len(items) == 2 or items[2].__class__ is StopFilter)
+        and not items[0].gaps
+    )
+
+
+def _fused_standard(
+    tokenizer,
+    stopper,
+    value,
+    positions=False,
+    chars=False,
+    keeporiginal=False,
+    removestops=True,
+    start_pos=0,
+    start_char=0,
+    tokenize=True,
+    mode="",
+    **kwargs,
+):
+    assert isinstance(value, str), f"{value!r} is not unicode"
+
+    stops = stopper.stops
+    minsize = stopper.min
+    maxsize = stopper.max
+    renumber = stopper.renumber and positions
+
+    t = Token(positions, chars, removestops=removestops, mode=mode, **kwargs)
+    pos = start_pos
+    # Position counter for renumbering tokens around removed stop words
+    newpos = None
+    if chars:
+        items = tokenizer._finditer(value)
+    else:
+        items = tokenizer._texts(value)
+    for item in items:
+        if chars:
+            original = item.group(0)
+            t.startchar = start_char + item.start()
+            t.endchar = start_char + item.end()
+        else:
+            original = item
+        text = original.lower()
+        t.text = text
+        t.boost = 1.0
+        if keeporiginal:
+            t.original = original
+        if positions:
+            t.pos = pos
+            pos += 1
+
+        size = len(text)
+        if (
+            size >= minsize
+            and (maxsize is None or size <= maxsize)
+            and text not in stops
+        ):
+            if renumber:
+                if newpos is None:
+                    newpos = t.pos
+                else:
+                    newpos += 1
+                    t.pos = newpos
+            t.stopped = False
+            yield t
+        elif not removestops:
+            t.stopped = True
+            yield t
+
+
+def _fused_standard_batch(tokenizer, stopper, values, positions, chars):
+    # Batch version of _fused_standard() that yields tuples instead of setting
+    # attributes on a token object
+    matchfn = tokenizer._finditer if chars else tokenizer._texts
+    stops = stopper.stops
+    minsize = stopper.min
+    maxsize = stopper.max
+    renumber = stopper.renumber
+
+    pos = startchar = endchar = None
+    for docnum, value in enumerate(values):
+        assert isinstance(value, str), f"{value!r} is not unicode"
+        # Index of the current match, and the position counter for
+        # renumbering tokens around removed stop words
+        i = 0
+        newpos = None
+        for item in matchfn(value):
+            if chars:
+                startchar, endchar = item.span()
+                item = item.group(0)
+            text = item.lower()
+            size = len(text)
+            if (
+                size >= minsize
+                and (maxsize is None or size <= maxsize)
+                and text not in stops
+            ):
+                if positions:
+                    if renumber and newpos is not None:
+                        newpos += 1
+                    else:
+                        newpos = i
+                    pos = newpos
+                yield (docnum, text, pos, startchar, endchar)
+            i += 1
+
+
 # Functions that return composed analyzers
 
 
@@ -198,6 +403,40 @@ def StandardAnalyzer(
     return chain
 
 
+def standard_analyzer(
+    expression=default_pattern, stoplist=STOP_WORDS, minsize=2, maxsize=None, gaps=False
+):
+    """Like :func:`StandardAnalyzer`, but returns a shared analyzer object
+    from a cache when called again with the same arguments. This is useful
+    for schemas with many text fields configured the same way.
+
+    >>> standard_analyzer() is standard_analyzer()
+    True
+
+    Because the returned analyzer may be shared, don't modify it. (Composing
+    it with other filters using ``|`` creates a new analyzer and is fine.)
+    The analyzer has no mutable state, so sharing it between threads is safe.
+
+    The arguments are the same as for :func:`StandardAnalyzer`. The stoplist is
+    converted to a frozenset so it can be used as part of the cache key.
+    """
+
+    if stoplist is not None and not isinstance(stoplist, frozenset):
+        stoplist = frozenset(stoplist)
+    return _cached_standard_analyzer(expression, stoplist, minsize, maxsize, gaps)
+
+
+@lru_cache(maxsize=32)
+def _cached_standard_analyzer(expression, stoplist, minsize, maxsize, gaps):
+    return StandardAnalyzer(
+        expression=expression,
+        stoplist=stoplist,
+        minsize=minsize,
+        maxsize=maxsize,
+        gaps=gaps,
+    )
+
+
 def StemmingAnalyzer(
     expression=default_pattern,
     stoplist=STOP_WORDS,
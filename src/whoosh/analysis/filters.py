@@ -25,6 +25,7 @@
 # those of the authors and should not be interpreted as representing official
 # policies, either expressed or implied, of Matt Chaput.
 
+from array import array
 from itertools import chain
 
 from whoosh.analysis.acore import Composable
@@ -264,13 +265,22 @@ class LowercaseFilter(Filter):
             t.text = t.text.lower()
             yield t
 
+    def filter_batch(self, b):
+        """Lowercases the texts of a :class:`whoosh.analysis.TokenBatch` in
+        place and returns it.
+        """
+
+        b.texts = [text.lower() for text in b.texts]
+        return b
+
 
 class StripFilter(Filter):
     """Calls unicode.strip() on the token text."""
 
     def __call__(self, tokens):
+        strip = str.strip
         for t in tokens:
-            t.text = t.text.strip()
+            t.text = strip(t.text)
             yield t
 
 
@@ -297,8 +307,8 @@ class StopFilter(Filter):
     ):
         """
         :param stoplist: A collection of words to remove from the stream.
-            This is converted to a frozenset. The default is a list of
-            common English stop words.
+            This is converted to a frozenset (a frozenset is used as-is). The
+            default is a list of common English stop words.
         :param minsize: The minimum length of token texts. Tokens with
             text smaller than this will be stopped. The default is 2.
         :param maxsize: The maximum length of token texts. Tokens with text
@@ -309,15 +319,20 @@ class StopFilter(Filter):
             language
         """
 
-        stops = set()
-        if stoplist:
-            stops.update(stoplist)
-        if lang:
-            from whoosh.lang import stopwords_for_language
+        if isinstance(stoplist, frozenset) and not lang:
+            # Share the given set (e.g. STOP_WORDS) instead of copying it
+            stops = stoplist
+        else:
+            stops = set()
+            if stoplist:
+                stops.update(stoplist)
+            if lang:
+                from whoosh.lang import stopwords_for_language
 
-            stops.update(stopwords_for_language(lang))
+                stops.update(stopwords_for_language(lang))
+            stops = frozenset(stops)
 
-        self.stops = frozenset(stops)
+        self.stops = stops
         self.min = minsize
         self.max = maxsize
         self.renumber = renumber
@@ -340,9 +355,10 @@ class StopFilter(Filter):
         pos = None
         for t in tokens:
             text = t.text
+            size = len(text)
             if (
-                len(text) >= minsize
-                and (maxsize is None or len(text) <= maxsize)
+                size >= minsize
+                and (maxsize is None or size <= maxsize)
                 and text not in stoplist
             ):
                 # This is not a stop word
@@ -361,6 +377,38 @@ class StopFilter(Filter):
                     t.stopped = True
                     yield t
 
+    def filter_batch(self, b):
+        """Removes stop words from a :class:`whoosh.analysis.TokenBatch` in
+        place and returns it. Unlike the token stream version, stopped tokens
+        are always removed.
+        """
+
+        stoplist = self.stops
+        minsize = self.min
+        maxsize = self.max
+
+        if maxsize is None:
+            # Common case, leave the maxsize test out of the loop
+            keep = [
+                i
+                for i, text in enumerate(b.texts)
+                if len(text) >= minsize and text not in stoplist
+            ]
+        else:
+            keep = [
+                i
+                for i, text in enumerate(b.texts)
+                if minsize <= len(text) <= maxsize and text not in stoplist
+            ]
+        if len(keep) < len(b):
+            b.select(keep)
+            if self.renumber and keep:
+                # Like the stream version, the first remaining token keeps its
+                # position and the rest are numbered consecutively after it
+                first = b.positions[0]
+                b.positions = array("i", range(first, first + len(keep)))
+        return b
+
 
 class CharsetFilter(Filter):
     """Translates the text of tokens by calling unicode.translate() using the
@@ -520,9 +568,9 @@ class SubstitutionFilter(Filter):
         )
 
     def __call__(self, tokens):
-        pattern = self.pattern
+        sub = self.pattern.sub
         replacement = self.replacement
 
         for t in tokens:
-            t.text = pattern.sub(replacement, t.text)
+            t.text = sub(replacement, t.text)
             yield t
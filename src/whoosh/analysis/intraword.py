@@ -331,6 +331,22 @@ class IntraWordFilter(Filter):
         self.splitting = splitwords or splitnums
         self.mergewords = mergewords
         self.mergenums = mergenums
+        self._make_splitter()
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Older pickles don't have the splitter attribute
+        if "splitter" not in state:
+            self._make_splitter()
+
+    def _make_splitter(self):
+        # Expression that matches if the token text would be split at all:
+        # a delimiter, an apostrophe (possessive), or a case/letter-number
+        # transition. Text that doesn't match can skip _split() entirely
+        splitpat = f"[{self.delims}']"
+        if self.splitting:
+            splitpat += "|" + self.boundary.pattern
+        self.splitter = re.compile(splitpat, re.UNICODE)
 
     def __eq__(self, other):
         return (
@@ -451,6 +467,7 @@ class IntraWordFilter(Filter):
     def __call__(self, tokens):
         mergewords = self.mergewords
         mergenums = self.mergenums
+        splitter_search = self.splitter.search
 
         # This filter renumbers tokens as it expands them. New position
         # counter.
@@ -468,10 +485,16 @@ class IntraWordFilter(Filter):
                     newpos = 0
 
             if (
-                text.isalpha() and (text.islower() or text.isupper())
-            ) or text.isdigit():
+                (
+                    text.isalpha()
+                    and (text.islower() or text.isupper() or text.istitle())
+                )
+                or text.isdigit()
+                or (text and splitter_search(text) is None)
+            ):
                 # Short-circuit the common cases of no delimiters, no case
-                # transitions, only digits, etc.
+                # transitions, only digits, etc. The str methods are much
+                # faster than a regex search, so try them first
                 t.pos = newpos
                 yield t
                 newpos += 1
@@ -25,10 +25,11 @@
 # those of the authors and should not be interpreted as representing official
 # policies, either expressed or implied, of Matt Chaput.
 
+from functools import lru_cache
+
 from whoosh.analysis.filters import Filter
 from whoosh.lang.dmetaphone import double_metaphone
 from whoosh.lang.porter import stem
-from whoosh.util.cache import lfu_cache, unbound_cache
 
 
 class StemFilter(Filter):
@@ -119,16 +120,18 @@ class StemFilter(Filter):
         else:
             stemfn = self.stemfn
 
+        # functools.lru_cache is implemented in C, so a cache hit is much
+        # cheaper than going through a Python-level caching wrapper
         if isinstance(self.cachesize, int) and self.cachesize != 0:
             if self.cachesize < 0:
-                self._stem = unbound_cache(stemfn)
-            elif self.cachesize > 1:
-                self._stem = lfu_cache(self.cachesize)(stemfn)
+                self._stem = lru_cache(maxsize=None)(stemfn)
+            else:
+                self._stem = lru_cache(maxsize=self.cachesize)(stemfn)
         else:
             self._stem = stemfn
 
     def cache_info(self):
-        if self.cachesize <= 1:
+        if not isinstance(self.cachesize, int) or self.cachesize == 0:
             return None
         return self._stem.cache_info()
 
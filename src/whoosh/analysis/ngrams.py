@@ -25,10 +25,35 @@
 # those of the authors and should not be interpreted as representing official
 # policies, either expressed or implied, of Matt Chaput.
 
+from functools import lru_cache
+
 from whoosh.analysis.acore import Token
 from whoosh.analysis.filters import Filter, LowercaseFilter
 from whoosh.analysis.tokenizers import RegexTokenizer, Tokenizer
 
+# Tokens longer than this don't use the cached offsets, so a few unusually
+# long tokens can't fill the cache with huge tuples
+_MAX_CACHED_LEN = 64
+
+
+@lru_cache(maxsize=256)
+def _gram_spans(textlen, minsize, maxsize):
+    # Returns a tuple of the (start, end) offsets of all N-grams between
+    # minsize and maxsize long in a string of the given length. The offsets
+    # only depend on the length, and words tend to be short, so caching them
+    # saves recomputing the same offsets for every token
+
+    spans = []
+    for start in range(0, textlen - minsize + 1):
+        for size in range(minsize, maxsize + 1):
+            end = start + size
+            if end > textlen:
+                # Sizes only get bigger from here
+                break
+            spans.append((start, end))
+    return tuple(spans)
+
+
 # Tokenizer
 
 
@@ -102,11 +127,14 @@ class NgramTokenizer(Tokenizer):
                 yield t
                 pos += 1
         else:
-            for start in range(0, inlen - self.min + 1):
-                for size in range(self.min, self.max + 1):
+            minsize = self.min
+            sizes = range(minsize, self.max + 1)
+            for start in range(0, inlen - minsize + 1):
+                for size in sizes:
                     end = start + size
                     if end > inlen:
-                        continue
+                        # Sizes only get bigger from here
+                        break
                     t.text = value[start:end]
                     if keeporiginal:
                         t.original = t.text
@@ -165,9 +193,11 @@ class NgramFilter(Filter):
     def __call__(self, tokens):
         assert hasattr(tokens, "__iter__")
         at = self.at
+        minsize = self.min
+        maxsize = self.max
         for t in tokens:
             text = t.text
-            if len(text) < self.min:
+            if len(text) < minsize:
                 continue
 
             chars = t.chars
@@ -178,7 +208,7 @@ class NgramFilter(Filter):
             # untouched.
 
             if t.mode == "query":
-                size = min(self.max, len(t.text))
+                size = min(maxsize, len(text))
                 if at == -1:
                     t.text = text[:size]
                     if chars:
@@ -198,8 +228,8 @@ class NgramFilter(Filter):
                         yield t
             else:
                 if at == -1:
-                    limit = min(self.max, len(text))
-                    for size in range(self.min, limit + 1):
+                    limit = min(maxsize, len(text))
+                    for size in range(minsize, limit + 1):
                         t.text = text[:size]
                         if chars:
                             t.endchar = startchar + size
@@ -208,18 +238,28 @@ class NgramFilter(Filter):
                 elif at == 1:
                     if chars:
                         original_startchar = t.startchar
-                    start = max(0, len(text) - self.max)
-                    for i in range(start, len(text) - self.min + 1):
+                    start = max(0, len(text) - maxsize)
+                    for i in range(start, len(text) - minsize + 1):
                         t.text = text[i:]
                         if chars:
                             t.startchar = original_startchar + i
                         yield t
+                elif len(text) <= _MAX_CACHED_LEN:
+                    for start, end in _gram_spans(len(text), minsize, maxsize):
+                        t.text = text[start:end]
+
+                        if chars:
+                            t.startchar = startchar + start
+                            t.endchar = startchar + end
+
+                        yield t
                 else:
-                    for start in range(0, len(text) - self.min + 1):
-                        for size in range(self.min, self.max + 1):
+                    textlen = len(text)
+                    for start in range(0, textlen - minsize + 1):
+                        for size in range(minsize, maxsize + 1):
                             end = start + size
-                            if end > len(text):
-                                continue
+                            if end > textlen:
+                                break
 
                             t.text = text[start:end]
 
@@ -25,11 +25,27 @@
 # those of the authors and should not be interpreted as representing official
 # policies, either expressed or implied, of Matt Chaput.
 
-from whoosh.analysis.acore import Composable, Token
+import re
+
+from whoosh.analysis.acore import (
+    Composable,
+    Token,
+    TokenBatch,
+    batch_tuples,
+    parallel_tuples,
+)
 from whoosh.util.text import rcompile
 
 default_pattern = rcompile(r"[\w\*]+(\.?[\w\*]+)*")
 
+# Equivalent to the default pattern, but without the capturing group, so that
+# findall() returns the entire matches
+_default_nocapture = rcompile(r"[\w\*]+(?:\.?[\w\*]+)*")
+# The default pattern only relies on \w, which matches exactly the same
+# characters in ASCII mode when the text is pure ASCII, and the regex engine
+# runs noticeably faster in ASCII mode
+_ascii_default_pattern = re.compile(_default_nocapture.pattern, re.ASCII)
+
 
 # Tokenizers
 
@@ -40,6 +56,22 @@ class Tokenizer(Composable):
     def __eq__(self, other):
         return other and self.__class__ is other.__class__
 
+    def batch(self, values, positions=False, chars=False, **kwargs):
+        """Tokenizes a sequence of strings and yields a
+        ``(docnum, text, pos, startchar, endchar)`` tuple for each token, the
+        same as :meth:`whoosh.analysis.Analyzer.batch`. (Tokenizers can be
+        used as analyzers.)
+        """
+
+        return batch_tuples(self, values, positions, chars, **kwargs)
+
+    def analyze_many(self, values, workers=None, chunksize=64, **kwargs):
+        """Tokenizes a sequence of strings in parallel using a pool of worker
+        processes, the same as :meth:`whoosh.analysis.Analyzer.analyze_many`.
+        """
+
+        return parallel_tuples(self, values, workers, chunksize, **kwargs)
+
 
 class IDTokenizer(Tokenizer):
     """Yields the entire input string as a single token. For use in indexed but
@@ -91,6 +123,10 @@ class RegexTokenizer(Tokenizer):
             of the expression equals a token. Group 0 (the entire matched text)
             is used as the text of the token. If you require more complicated
             handling of the expression match, simply write your own tokenizer.
+            Strings are compiled with the standard library ``re`` module (with
+            the ``re.UNICODE`` flag). You can also pass an expression compiled
+            with the third-party ``regex`` module, which is faster than ``re``
+            for some patterns.
         :param gaps: If True, the tokenizer *splits* on the expression, rather
             than matching on the expression.
         """
@@ -104,6 +140,28 @@ class RegexTokenizer(Tokenizer):
                 return True
         return False
 
+    def _finditer(self, value):
+        # Returns an iterator of the expression's matches in the given string,
+        # using the ASCII version of the default pattern if possible
+        expression = self.expression
+        if expression == default_pattern and value.isascii():
+            expression = _ascii_default_pattern
+        return expression.finditer(value)
+
+    def _texts(self, value):
+        # Returns a list of the texts of the expression's matches in the given
+        # string. findall() skips creating a match object for every token, but
+        # only returns the entire matches if the expression has no groups
+        expression = self.expression
+        if expression == default_pattern:
+            if value.isascii():
+                expression = _ascii_default_pattern
+            else:
+                expression = _default_nocapture
+        elif expression.groups:
+            return [match.group(0) for match in expression.finditer(value)]
+        return expression.findall(value)
+
     def __call__(
         self,
         value,
@@ -134,8 +192,10 @@ class RegexTokenizer(Tokenizer):
 
         t = Token(positions, chars, removestops=removestops, mode=mode, **kwargs)
         if not tokenize:
-            t.original = t.text = value
+            t.text = value
             t.boost = 1.0
+            if keeporiginal:
+                t.original = value
             if positions:
                 t.pos = start_pos
             if chars:
@@ -144,18 +204,29 @@ class RegexTokenizer(Tokenizer):
             yield t
         elif not self.gaps:
             # The default: expression matches are used as tokens
-            for pos, match in enumerate(self.expression.finditer(value)):
-                t.text = match.group(0)
-                t.boost = 1.0
-                if keeporiginal:
-                    t.original = t.text
-                t.stopped = False
-                if positions:
-                    t.pos = start_pos + pos
-                if chars:
+            if chars:
+                for pos, match in enumerate(self._finditer(value)):
+                    t.text = match.group(0)
+                    t.boost = 1.0
+                    if keeporiginal:
+                        t.original = t.text
+                    t.stopped = False
+                    if positions:
+                        t.pos = start_pos + pos
                     t.startchar = start_char + match.start()
                     t.endchar = start_char + match.end()
-                yield t
+                    yield t
+            else:
+                # Without character offsets only the token texts are needed
+                for pos, text in enumerate(self._texts(value)):
+                    t.text = text
+                    t.boost = 1.0
+                    if keeporiginal:
+                        t.original = text
+                    t.stopped = False
+                    if positions:
+                        t.pos = start_pos + pos
+                    yield t
         else:
             # When gaps=True, iterate through the matches and
             # yield the text between them.
@@ -197,6 +268,46 @@ class RegexTokenizer(Tokenizer):
                     t.endchar = len(value)
                 yield t
 
+    def tokenize_batch(self, value, start_pos=0, start_char=0):
+        """Tokenizes the given string and returns the tokens as a
+        :class:`whoosh.analysis.TokenBatch` instead of a token stream.
+
+        :param value: The unicode string to tokenize.
+        :param start_pos: The position number of the first token.
+        :param start_char: The offset of the first character of the first
+            token.
+        """
+
+        assert isinstance(value, str), f"{value!r} is not unicode"
+
+        b = TokenBatch()
+        texts_append = b.texts.append
+        positions_append = b.positions.append
+        startchars_append = b.startchars.append
+        endchars_append = b.endchars.append
+
+        if self.gaps:
+            for t in self(
+                value,
+                positions=True,
+                chars=True,
+                start_pos=start_pos,
+                start_char=start_char,
+            ):
+                texts_append(t.text)
+                positions_append(t.pos)
+                startchars_append(t.startchar)
+                endchars_append(t.endchar)
+        else:
+            pos = start_pos
+            for match in self._finditer(value):
+                texts_append(match.group(0))
+                positions_append(pos)
+                pos += 1
+                startchars_append(start_char + match.start())
+                endchars_append(start_char + match.end())
+        return b
+
 
 class CharsetTokenizer(Tokenizer):
     """Tokenizes and translates text according to a character mapping object.
@@ -267,8 +378,10 @@ class CharsetTokenizer(Tokenizer):
 
         t = Token(positions, chars, removestops=removestops, mode=mode, **kwargs)
         if not tokenize:
-            t.original = t.text = value
+            t.text = value
             t.boost = 1.0
+            if keeporiginal:
+                t.original = value
             if positions:
                 t.pos = start_pos
             if chars:
@@ -326,20 +439,58 @@ def SpaceSeparatedTokenizer():
     return RegexTokenizer(r"[^ \t\r\n]+")
 
 
+class _CommaSeparatedTokenizer(RegexTokenizer):
+    # A RegexTokenizer that also strips the value when it's called with
+    # tokenize=False, the way the items are stripped when it's tokenized
+
+    def __call__(
+        self,
+        value,
+        positions=False,
+        chars=False,
+        keeporiginal=False,
+        removestops=True,
+        start_pos=0,
+        start_char=0,
+        tokenize=True,
+        mode="",
+        **kwargs,
+    ):
+        if not tokenize:
+            stripped = value.lstrip()
+            start_char += len(value) - len(stripped)
+            value = stripped.rstrip()
+        return RegexTokenizer.__call__(
+            self,
+            value,
+            positions,
+            chars,
+            keeporiginal,
+            removestops,
+            start_pos,
+            start_char,
+            tokenize,
+            mode,
+            **kwargs,
+        )
+
+
 def CommaSeparatedTokenizer():
     """Splits tokens by commas.
 
-    Note that the tokenizer calls unicode.strip() on each match of the regular
-    expression.
+    Leading and trailing whitespace around each comma-separated item is not
+    included in the token, and items containing only whitespace are skipped.
+    When called with ``tokenize=False``, the tokenizer yields the entire
+    value with leading and trailing whitespace removed.
 
     >>> cst = CommaSeparatedTokenizer()
     >>> [token.text for token in cst("hi there, what's , up")]
     ["hi there", "what's", "up"]
     """
 
-    from whoosh.analysis.filters import StripFilter
-
-    return RegexTokenizer(r"[^,]+") | StripFilter()
+    # Matches from the first to the last non-space character of each item,
+    # so the tokens don't need to be stripped afterwards
+    return _CommaSeparatedTokenizer(r"[^,\s](?:[^,]*[^,\s])?")
 
 
 class PathTokenizer(Tokenizer):
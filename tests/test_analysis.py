@@ -1,4 +1,5 @@
-from pickle import dumps
+from itertools import product
+from pickle import dumps, loads
 
 import pytest
 from whoosh import analysis, fields, qparser
@@ -14,6 +15,284 @@ def test_regextokenizer():
     rex = analysis.RegexTokenizer("[A-Z]+", gaps=True)
     assert [t.text for t in rex(value)] == ["aaa", "bbb", "ccc", "ddd"]
 
+    rex = analysis.RegexTokenizer("([A-Z])([A-Z]+)")
+    assert [t.text for t in rex(value)] == ["AAA", "BBB", "CCC", "DDD"]
+
+
+def test_regextokenizer_ascii():
+    rex = analysis.RegexTokenizer()
+    value = "alfa_1 bravo.charlie del*ta 3.14 x.y."
+    expected = [m.group(0) for m in rex.expression.finditer(value)]
+    assert [t.text for t in rex(value)] == expected
+    assert expected == ["alfa_1", "bravo.charlie", "del*ta", "3.14", "x.y"]
+
+    value = "caf\u00e9 na\u00efve \u00fcber_2"
+    assert [t.text for t in rex(value)] == value.split()
+
+
+def test_regextokenizer_positions_chars():
+    value = "alfa bravo  charlie"
+    rex = analysis.RegexTokenizer()
+
+    tokens = rex(value, positions=True, chars=True, start_pos=2, start_char=10)
+    tokens = [(t.text, t.pos, t.startchar, t.endchar) for t in tokens]
+    assert tokens == [
+        ("alfa", 2, 10, 14),
+        ("bravo", 3, 15, 20),
+        ("charlie", 4, 22, 29),
+    ]
+
+    assert [(t.text, t.pos) for t in rex(value, positions=True)] == [
+        ("alfa", 0),
+        ("bravo", 1),
+        ("charlie", 2),
+    ]
+    assert [(t.startchar, t.endchar) for t in rex(value, chars=True)] == [
+        (0, 4),
+        (5, 10),
+        (12, 19),
+    ]
+    assert [t.original for t in rex(value, keeporiginal=True)] == [
+        "alfa",
+        "bravo",
+        "charlie",
+    ]
+    tokens = rex(value, tokenize=False, keeporiginal=True)
+    assert [(t.text, t.original) for t in tokens] == [(value, value)]
+
+
+def test_standard_analyzer_fused():
+    value = "The quick BROWN fox is a fox of the Year 2000 ok"
+    ana = analysis.StandardAnalyzer(maxsize=4)
+
+    def unfused(**kwargs):
+        tokens = analysis.RegexTokenizer()(value, **kwargs)
+        tokens = analysis.LowercaseFilter()(tokens)
+        return analysis.StopFilter(maxsize=4)(tokens)
+
+    def attrs(tokens):
+        return [
+            (t.text, t.pos, t.startchar, t.endchar, t.stopped, t.original)
+            for t in tokens
+        ]
+
+    for removestops in (True, False):
+        kwargs = {
+            "positions": True,
+            "chars": True,
+            "keeporiginal": True,
+            "removestops": removestops,
+            "start_pos": 3,
+            "start_char": 5,
+        }
+        assert attrs(ana(value, **kwargs)) == attrs(unfused(**kwargs))
+
+    assert [t.text for t in ana(value)] == ["fox", "fox", "year", "2000", "ok"]
+    assert [t.text for t in ana("A B", tokenize=False)] == ["a b"]
+
+
+def test_token_batch():
+    value = "The quick BROWN fox is a fox"
+    rex = analysis.RegexTokenizer()
+    b = rex.tokenize_batch(value, start_pos=2, start_char=10)
+    assert isinstance(b, analysis.TokenBatch)
+    assert b.texts == ["The", "quick", "BROWN", "fox", "is", "a", "fox"]
+    assert list(b.positions) == [2, 3, 4, 5, 6, 7, 8]
+    assert list(b.startchars) == [10, 14, 20, 26, 30, 33, 35]
+    assert list(b.endchars) == [13, 19, 25, 29, 32, 34, 38]
+
+    b = analysis.LowercaseFilter().filter_batch(b)
+    b = analysis.StopFilter().filter_batch(b)
+    ana = analysis.StandardAnalyzer()
+    tokens = ana(value, positions=True, chars=True, start_pos=2, start_char=10)
+    assert [(t.text, t.pos, t.startchar, t.endchar) for t in tokens] == list(
+        zip(b.texts, b.positions, b.startchars, b.endchars)
+    )
+
+    b = rex.tokenize_batch("alfa BRAVO a charlie deltaecho")
+    b = analysis.StopFilter(minsize=3, maxsize=7).filter_batch(b)
+    assert b.texts == ["alfa", "BRAVO", "charlie"]
+    assert list(b.positions) == [0, 1, 2]
+
+    gb = analysis.RegexTokenizer(r"\s+", gaps=True).tokenize_batch("alfa  bravo")
+    assert gb.texts == ["alfa", "bravo"]
+    assert list(gb.startchars) == [0, 6]
+
+
+def test_analyzer_batch():
+    values = ["The quick BROWN fox", "", "is a fox of the Year 2000 ok"]
+    ana = analysis.StandardAnalyzer(maxsize=4)
+    for positions in (False, True):
+        for chars in (False, True):
+            fused = list(ana.batch(values, positions=positions, chars=chars))
+            generic = list(
+                analysis.Analyzer.batch(ana, values, positions=positions, chars=chars)
+            )
+            assert fused == generic
+
+    assert list(ana.batch(values, positions=True, chars=True)) == [
+        (0, "fox", 3, 16, 19),
+        (2, "fox", 2, 5, 8),
+        (2, "year", 3, 16, 20),
+        (2, "2000", 4, 21, 25),
+        (2, "ok", 5, 26, 28),
+    ]
+
+    ana = analysis.StemmingAnalyzer()
+    assert list(ana.batch(["rendering", "the renders"], positions=True)) == [
+        (0, "render", 0, None, None),
+        (1, "render", 1, None, None),
+    ]
+
+
+def test_tokenizer_field_batch():
+    # A bare tokenizer is a valid field analyzer, so it must support the same
+    # batch() contract as analyzers
+    schema = fields.Schema(
+        tags=fields.KEYWORD, body=fields.TEXT(analyzer=analysis.RegexTokenizer())
+    )
+    for fieldname in ("tags", "body"):
+        ana = schema[fieldname].analyzer
+        assert isinstance(ana, analysis.Tokenizer)
+        tokens = list(ana.batch(["alfa bravo", "charlie"], positions=True))
+        assert tokens == [
+            (0, "alfa", 0, None, None),
+            (0, "bravo", 1, None, None),
+            (1, "charlie", 0, None, None),
+        ]
+
+
+def test_analyze_many():
+    ana = analysis.StemmingAnalyzer()
+    values = ["Hello there", "", "rendering the renders"] * 10
+    expected = []
+    for value in values:
+        tokens = ana(value, positions=True, chars=True)
+        expected.append([(t.text, t.pos, t.startchar, t.endchar) for t in tokens])
+    assert ana.analyze_many(values, workers=2, chunksize=4) == expected
+
+    with pytest.raises(TypeError):
+        ana.analyze_many(values, positions=False)
+
+
+def test_tokenizer_field_analyze_many():
+    schema = fields.Schema(tags=fields.KEYWORD, id=fields.ID)
+    ana = schema["tags"].analyzer
+    assert isinstance(ana, analysis.Tokenizer)
+    assert ana.analyze_many(["alfa bravo", "charlie"], workers=2) == [
+        [("alfa", 0, 0, 4), ("bravo", 1, 5, 10)],
+        [("charlie", 0, 0, 7)],
+    ]
+
+    ana = schema["id"].analyzer
+    tokens = ana("a/b c", positions=True, chars=True)
+    expected = [[(t.text, t.pos, t.startchar, t.endchar) for t in tokens]]
+    assert ana.analyze_many(["a/b c"], workers=1) == expected
+
+
+def test_fused_matches_unfused():
+    # The fused chains duplicate StopFilter's logic, so check them against the
+    # regular generator chain for every combination of the filter's options
+    values = ["The quick BROWN fox is a fox of the Year 2000 ok", "", "A b"]
+    names = ("text", "pos", "startchar", "endchar", "stopped", "original")
+
+    def attrs(tokens):
+        return [tuple(getattr(t, name, None) for name in names) for t in tokens]
+
+    def unfused(stopper, value, **kwargs):
+        tokens = analysis.RegexTokenizer()(value, **kwargs)
+        tokens = analysis.LowercaseFilter()(tokens)
+        if stopper is not None:
+            tokens = stopper(tokens)
+        return attrs(tokens)
+
+    stoppers = [None] + [
+        analysis.StopFilter(minsize=minsize, maxsize=maxsize, renumber=renumber)
+        for renumber, minsize, maxsize in product((True, False), (0, 2, 3), (None, 4))
+    ]
+
+    for stopper in stoppers:
+        ana = analysis.RegexTokenizer() | analysis.LowercaseFilter()
+        if stopper is not None:
+            ana = ana | stopper
+        assert ana._fused
+
+        for value in values:
+            for removestops in (True, False):
+                for positions in (True, False):
+                    for chars in (True, False):
+                        kwargs = {
+                            "positions": positions,
+                            "chars": chars,
+                            "keeporiginal": True,
+                            "removestops": removestops,
+                        }
+                        fused = attrs(ana(value, **kwargs))
+                        assert fused == unfused(stopper, value, **kwargs)
+
+        for positions in (True, False):
+            for chars in (True, False):
+                fused = list(ana.batch(values, positions=positions, chars=chars))
+                generic = analysis.Analyzer.batch(
+                    ana, values, positions=positions, chars=chars
+                )
+                assert fused == list(generic)
+
+
+def test_simple_analyzer_fused():
+    value = "The quick BROWN fox is a fox"
+    ana = analysis.SimpleAnalyzer()
+    tokens = ana(value, positions=True, chars=True, start_pos=1)
+    assert [(t.text, t.pos, t.startchar) for t in tokens] == [
+        ("the", 1, 0),
+        ("quick", 2, 4),
+        ("brown", 3, 10),
+        ("fox", 4, 16),
+        ("is", 5, 20),
+        ("a", 6, 23),
+        ("fox", 7, 25),
+    ]
+    assert list(ana.batch([value], positions=True)) == list(
+        analysis.Analyzer.batch(ana, [value], positions=True)
+    )
+
+
+def test_shared_standard_analyzer():
+    ana = analysis.standard_analyzer()
+    assert ana is analysis.standard_analyzer()
+    assert ana == analysis.StandardAnalyzer()
+    assert analysis.standard_analyzer(stoplist=["a", "b"]) is (
+        analysis.standard_analyzer(stoplist=("b", "a"))
+    )
+    assert analysis.standard_analyzer(minsize=3) is not ana
+    assert [t.text for t in ana("Testing is testing")] == ["testing", "testing"]
+
+
+def test_comma_tokenizer():
+    cst = analysis.CommaSeparatedTokenizer()
+    value = " hi there, what's , up,,x "
+    tokens = cst(value, positions=True, chars=True)
+    tokens = [(t.text, t.pos, t.startchar, t.endchar) for t in tokens]
+    assert tokens == [
+        ("hi there", 0, 1, 9),
+        ("what's", 1, 11, 17),
+        ("up", 2, 20, 22),
+        ("x", 3, 24, 25),
+    ]
+
+    # The untokenized value is stripped too (e.g. range query endpoints)
+    tokens = cst(" a b ", tokenize=False, chars=True)
+    assert [(t.text, t.startchar, t.endchar) for t in tokens] == [("a b", 1, 4)]
+
+    # Positional arguments mean the same as for RegexTokenizer
+    tokens = cst("a, b", True)
+    assert [(t.text, t.pos) for t in tokens] == [("a", 0), ("b", 1)]
+
+    ana = fields.KEYWORD(commas=True, lowercase=True).analyzer
+    assert ana._fused
+    assert [t.text for t in ana(" A b ", tokenize=False)] == ["a b"]
+    assert [t.text for t in ana(" A b , C")] == ["a b", "c"]
+
 
 def test_path_tokenizer():
     value = "/alfa/bravo/charlie/delta/"
@@ -155,6 +434,28 @@ def test_intraword():
     )
 
 
+def test_intraword_unsplit():
+    iwf = analysis.IntraWordFilter()
+    ana = analysis.RegexTokenizer(r"\S+") | iwf
+    value = "Hello World x1 A-b"
+    tokens = [(t.pos, t.text) for t in ana(value)]
+    assert tokens == [
+        (0, "Hello"),
+        (1, "World"),
+        (2, "x"),
+        (3, "1"),
+        (4, "A"),
+        (5, "b"),
+    ]
+
+    # Filters pickled before the splitter attribute existed
+    state = dict(iwf.__dict__)
+    del state["splitter"]
+    old = analysis.IntraWordFilter.__new__(analysis.IntraWordFilter)
+    old.__setstate__(state)
+    assert old == iwf
+
+
 def test_intraword_chars():
     iwf = analysis.IntraWordFilter(mergewords=True, mergenums=True)
     ana = analysis.RegexTokenizer(r"\S+") | iwf | analysis.LowercaseFilter()
@@ -428,6 +729,40 @@ def test_porter2():
 #                == ["fall", "pain", "rain", "stall", "strang", "strong"])
 
 
+def test_stem_cache():
+    words = "rendering renders rendering rendered".split()
+
+    sf = analysis.StemFilter(cachesize=2)
+    ana = analysis.RegexTokenizer() | sf
+    assert [t.text for t in ana(" ".join(words))] == ["render"] * 4
+    assert sf.cache_info() == (1, 3, 2, 2)
+
+    # A one-word cache never hits here, since every word differs from the one
+    # before it; an unbounded cache hits on the repeated word
+    for cachesize, info in ((1, (0, 4, 1, 1)), (-1, (1, 3, None, 3)), (None, None)):
+        sf = analysis.StemFilter(cachesize=cachesize)
+        ana = analysis.RegexTokenizer() | sf
+        assert [t.text for t in ana(" ".join(words))] == ["render"] * 4
+        assert sf.cache_info() == info
+
+
+def test_stem_filter_yields_tokens():
+    ana = (
+        analysis.RegexTokenizer()
+        | analysis.StopFilter()
+        | analysis.StemFilter(ignore=["rendering"])
+    )
+    tokens = [
+        (t.__class__, t.text, t.stopped)
+        for t in ana("the rendering renders", removestops=False)
+    ]
+    assert tokens == [
+        (analysis.Token, "the", True),
+        (analysis.Token, "rendering", False),
+        (analysis.Token, "render", False),
+    ]
+
+
 def test_url():
     sample = "Visit https://github.com/sygil-dev/whoosh-reloaded or urn:isbn:5930502 or http://www.apple.com/."
 
@@ -525,6 +860,41 @@ def test_ngrams():
     ]
 
 
+def test_ngrams_long_token():
+    # Tokens past the cached span length take the uncached loop, which should
+    # produce the same grams and offsets
+    word = "abcdefghij" * 7
+    ana = analysis.RegexTokenizer(r"\S+") | analysis.NgramFilter(2, 3)
+    tokens = [(t.text, t.startchar, t.endchar) for t in ana("x " + word, chars=True)]
+
+    target = [
+        (word[start : start + size], start + 2, start + size + 2)
+        for start in range(len(word) - 1)
+        for size in (2, 3)
+        if start + size <= len(word)
+    ]
+    assert tokens == target
+
+
+def test_ngram_tokenizer():
+    ngt = analysis.NgramTokenizer(2, 3)
+    tokens = [(t.text, t.startchar, t.endchar) for t in ngt("abcd", chars=True)]
+    assert tokens == [
+        ("ab", 0, 2),
+        ("abc", 0, 3),
+        ("bc", 1, 3),
+        ("bcd", 1, 4),
+        ("cd", 2, 4),
+    ]
+    assert [t.text for t in analysis.NgramTokenizer(4)("hi there")] == [
+        "hi t",
+        "i th",
+        " the",
+        "ther",
+        "here",
+    ]
+
+
 @pytest.mark.skipif("sys.version_info < (2,6)")
 def test_language_analyzer():
     domain = [
@@ -565,6 +935,14 @@ def test_charset_pickeability():
     _ = dumps(ana, -1)
 
 
+def test_stopfilter_pickleability():
+    ana = analysis.StandardAnalyzer(stoplist=["alfa"], minsize=3, maxsize=5)
+    ana2 = loads(dumps(ana, -1))
+    assert ana2 == ana
+    value = "alfa bravo ab charlie delta"
+    assert [t.text for t in ana2(value)] == ["bravo", "delta"]
+
+
 def test_shingle_stopwords():
     # Note that the stop list is None here
     ana = (
@@ -635,6 +1013,13 @@ def test_stop_lang():
     assert ls == ["lapiz", "mesa"]
 
 
+def test_stoplist_frozenset():
+    assert analysis.StopFilter().stops is analysis.STOP_WORDS
+    assert analysis.StopFilter(["a", "b"]).stops == frozenset(["a", "b"])
+    stops = analysis.StopFilter(analysis.STOP_WORDS, lang="es").stops
+    assert "the" in stops and "el" in stops
+
+
 def test_issue358():
     t = analysis.RegexTokenizer(r"\w+")
     with pytest.raises(analysis.CompositionError):